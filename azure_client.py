@@ -1,39 +1,122 @@
 """
 Azure client for authentication and accessing resources
 """
+import json
+import time
+import base64
+import hashlib
+import importlib
+import threading
+from functools import lru_cache
 from azure.identity import DefaultAzureCredential, InteractiveBrowserCredential
 from azure.mgmt.resource import ResourceManagementClient, SubscriptionClient
-from azure.mgmt.network import NetworkManagementClient
-from azure.mgmt.compute import ComputeManagementClient
-from azure.mgmt.storage import StorageManagementClient
-from azure.mgmt.sql import SqlManagementClient
 from azure.core.exceptions import ClientAuthenticationError
 from rich.console import Console
 
 console = Console()
 
+# Token scope for Azure Resource Manager
+ARM_SCOPE = "https://management.azure.com/.default"
+
+# Seconds for which tenant and subscription listings are reused
+LISTING_CACHE_TTL = 300
+
+# Connection pool sizing for the HTTP session shared by all management clients
+POOL_CONNECTIONS = 32
+POOL_MAXSIZE = 64
+
+# Seconds before expiry at which a cached access token is refreshed
+TOKEN_REFRESH_MARGIN = 300
+
+class _CachingCredential:
+    """Token credential wrapper that reuses access tokens until they near expiry"""
+    
+    def __init__(self, credential):
+        self._credential = credential
+        self._tokens = {}
+        self._lock = threading.Lock()
+    
+    def get_token(self, *scopes, **kwargs):
+        """Return a cached access token for the scopes, fetching a new one if needed"""
+        # Claims challenges must always go to the underlying credential
+        if kwargs.get("claims"):
+            return self._credential.get_token(*scopes, **kwargs)
+        
+        key = (scopes, kwargs.get("tenant_id"))
+        # Serialize fetches so concurrent workers do not each trigger a login
+        with self._lock:
+            token = self._tokens.get(key)
+            if token is None or token.expires_on - time.time() <= TOKEN_REFRESH_MARGIN:
+                token = self._credential.get_token(*scopes, **kwargs)
+                self._tokens[key] = token
+            return token
+    
+    def close(self):
+        """Close the underlying credential"""
+        close = getattr(self._credential, "close", None)
+        if close:
+            close()
+
+@lru_cache(maxsize=None)
+def _client_class(module_name, class_name):
+    """Import a management client class on first use"""
+    # The network, compute, storage and SQL SDKs are large, so they are only
+    # loaded once a client of that kind is actually needed
+    return getattr(importlib.import_module(module_name), class_name)
+
 class AzureClient:
     """Client for accessing Azure resources"""
     
-    def __init__(self, interactive=True):
+    def __init__(self, interactive=True, max_connections=POOL_MAXSIZE):
         self.interactive = interactive
+        # Connections kept per host, so concurrent requests do not discard them
+        self.pool_maxsize = max(POOL_MAXSIZE, max_connections)
         self.credential = None
         self.tenant_id = None
-        self.resource_clients = {}
-        self.network_clients = {}
-        self.compute_clients = {}
-        self.storage_clients = {}
-        self.sql_clients = {}
+        # Management clients keyed by (client class, subscription ID)
+        self._client_cache = {}
+        self._client_lock = threading.Lock()
+        self._sub_client = None
+        self._tenants_cache = None
+        self._subs_cache = {}
+        self._cache_ts = {}
+        self._transport = None
+    
+    def _get_transport(self):
+        """Get or create the HTTP transport shared by all management clients"""
+        # A single session lets every client reuse warm connections to ARM
+        if self._transport is None:
+            import requests
+            from azure.core.pipeline.transport import RequestsTransport
+            
+            session = requests.Session()
+            adapter = requests.adapters.HTTPAdapter(
+                pool_connections=POOL_CONNECTIONS, pool_maxsize=self.pool_maxsize)
+            session.mount("https://", adapter)
+            self._transport = RequestsTransport(session=session, session_owner=False)
+        return self._transport
+    
+    def _get_subscription_client(self):
+        """Get or create the subscription client for the current credential"""
+        if self._sub_client is None:
+            self._sub_client = SubscriptionClient(self.credential, transport=self._get_transport())
+        return self._sub_client
+    
+    def _is_cache_fresh(self, key):
+        """Check whether the cached listing for the given key is still valid"""
+        ts = self._cache_ts.get(key)
+        return ts is not None and time.monotonic() - ts < LISTING_CACHE_TTL
     
     def login(self):
         """Login to Azure interactively or use default credentials"""
         if self.interactive:
             try:
                 console.print("[yellow]Launching browser for interactive Azure login...[/yellow]")
-                self.credential = InteractiveBrowserCredential()
-                # Force authentication to happen now
-                subscription_client = SubscriptionClient(self.credential)
-                tenants = list(subscription_client.tenants.list())
+                self.credential = _CachingCredential(InteractiveBrowserCredential())
+                self._reset_listings()
+                # Force authentication to happen now. Acquiring a token needs
+                # no ARM call, so cached tenant listings can still skip ARM.
+                self.credential.get_token(ARM_SCOPE)
                 return True
             except Exception as e:
                 console.print(f"[red]Error during interactive login: {str(e)}[/red]")
@@ -41,52 +124,80 @@ class AzureClient:
         
         # Use default credentials as fallback or if not interactive
         try:
-            self.credential = DefaultAzureCredential()
+            self.credential = _CachingCredential(DefaultAzureCredential())
+            self._reset_listings()
             # Test the credential
-            subscription_client = SubscriptionClient(self.credential)
-            tenants = list(subscription_client.tenants.list())
+            self.credential.get_token(ARM_SCOPE)
             return True
         except Exception as e:
             console.print(f"[red]Authentication error: {str(e)}[/red]")
             return False
     
+    def get_account_key(self):
+        """Get a hashed identifier of the signed-in account, or None if unknown"""
+        try:
+            # The access token is a JWT; its object ID claim identifies the account
+            token = self.credential.get_token(ARM_SCOPE).token
+            payload = token.split(".")[1]
+            claims = json.loads(base64.urlsafe_b64decode(payload + "=" * (-len(payload) % 4)))
+            account = claims.get("oid") or claims.get("sub")
+        except Exception:
+            return None
+        return hashlib.sha256(account.encode()).hexdigest() if account else None
+    
     def get_tenants(self):
         """Get available Azure tenants"""
         if not self.credential:
             if not self.login():
                 return []
         
+        if self._tenants_cache is not None and self._is_cache_fresh("tenants"):
+            return self._tenants_cache
+        
         try:
-            subscription_client = SubscriptionClient(self.credential)
-            tenants = []
-            
-            for tenant in subscription_client.tenants.list():
-                tenants.append((tenant.tenant_id, tenant.display_name or tenant.tenant_id))
-            
-            return tenants
+            return self._list_tenants()
         except Exception as e:
             console.print(f"[red]Error retrieving tenants: {str(e)}[/red]")
             return []
     
+    def _list_tenants(self):
+        """List tenants from ARM and store them in the tenant cache"""
+        subscription_client = self._get_subscription_client()
+        tenants = []
+        
+        for page in subscription_client.tenants.list().by_page():
+            tenants.extend((tenant.tenant_id, tenant.display_name or tenant.tenant_id) for tenant in page)
+        
+        self._tenants_cache = tenants
+        self._cache_ts["tenants"] = time.monotonic()
+        return tenants
+    
+    def _reset_listings(self):
+        """Drop the subscription client and listings cached for the previous credential"""
+        self._sub_client = None
+        self._tenants_cache = None
+        self._subs_cache = {}
+        self._cache_ts = {}
+    
     def set_tenant(self, tenant_id):
         """Set the current tenant ID"""
         self.tenant_id = tenant_id
         # Clear clients when changing tenant
-        self.resource_clients = {}
-        self.network_clients = {}
-        self.compute_clients = {}
-        self.storage_clients = {}
-        self.sql_clients = {}
+        with self._client_lock:
+            self._client_cache = {}
+        
+        # Invalidate cached listings and the subscription client
+        self._reset_listings()
         
         # Re-create credential for specific tenant
         if self.interactive:
             try:
-                self.credential = InteractiveBrowserCredential(tenant_id=tenant_id)
+                self.credential = _CachingCredential(InteractiveBrowserCredential(tenant_id=tenant_id))
             except Exception:
                 console.print("[yellow]Error with tenant-specific credential, using default credential[/yellow]")
-                self.credential = DefaultAzureCredential()
+                self.credential = _CachingCredential(DefaultAzureCredential())
         else:
-            self.credential = DefaultAzureCredential()
+            self.credential = _CachingCredential(DefaultAzureCredential())
     
     def get_subscriptions(self):
         """Get all available subscriptions for the current tenant"""
@@ -94,49 +205,51 @@ class AzureClient:
             if not self.login():
                 return []
         
+        cache_key = ("subscriptions", self.tenant_id)
+        if self.tenant_id in self._subs_cache and self._is_cache_fresh(cache_key):
+            return self._subs_cache[self.tenant_id]
+        
         try:
-            subscription_client = SubscriptionClient(self.credential)
+            subscription_client = self._get_subscription_client()
             subscriptions = []
             
-            for sub in subscription_client.subscriptions.list():
-                subscriptions.append((sub.subscription_id, sub.display_name or sub.subscription_id))
+            for page in subscription_client.subscriptions.list().by_page():
+                subscriptions.extend((sub.subscription_id, sub.display_name or sub.subscription_id) for sub in page)
             
+            self._subs_cache[self.tenant_id] = subscriptions
+            self._cache_ts[cache_key] = time.monotonic()
             return subscriptions
         except ClientAuthenticationError as e:
             console.print(f"[red]Authentication error: {str(e)}[/red]")
             return []
     
+    def _get_client(self, client_class, subscription_id):
+        """Get or create a management client of the given class for the subscription"""
+        key = (client_class, subscription_id)
+        # Export workers call this concurrently, so the check and insert share a lock
+        with self._client_lock:
+            client = self._client_cache.get(key)
+            if client is None:
+                client = client_class(self.credential, subscription_id, transport=self._get_transport())
+                self._client_cache[key] = client
+            return client
+    
     def get_resource_client(self, subscription_id):
         """Get or create a resource client for the given subscription"""
-        if subscription_id not in self.resource_clients:
-            self.resource_clients[subscription_id] = ResourceManagementClient(
-                self.credential, subscription_id)
-        return self.resource_clients[subscription_id]
+        return self._get_client(ResourceManagementClient, subscription_id)
     
     def get_network_client(self, subscription_id):
         """Get or create a network client for the given subscription"""
-        if subscription_id not in self.network_clients:
-            self.network_clients[subscription_id] = NetworkManagementClient(
-                self.credential, subscription_id)
-        return self.network_clients[subscription_id]
+        return self._get_client(_client_class("azure.mgmt.network", "NetworkManagementClient"), subscription_id)
     
     def get_compute_client(self, subscription_id):
         """Get or create a compute client for the given subscription"""
-        if subscription_id not in self.compute_clients:
-            self.compute_clients[subscription_id] = ComputeManagementClient(
-                self.credential, subscription_id)
-        return self.compute_clients[subscription_id]
+        return self._get_client(_client_class("azure.mgmt.compute", "ComputeManagementClient"), subscription_id)
     
     def get_storage_client(self, subscription_id):
         """Get or create a storage client for the given subscription"""
-        if subscription_id not in self.storage_clients:
-            self.storage_clients[subscription_id] = StorageManagementClient(
-                self.credential, subscription_id)
-        return self.storage_clients[subscription_id]
+        return self._get_client(_client_class("azure.mgmt.storage", "StorageManagementClient"), subscription_id)
     
     def get_sql_client(self, subscription_id):
         """Get or create a SQL client for the given subscription"""
-        if subscription_id not in self.sql_clients:
-            self.sql_clients[subscription_id] = SqlManagementClient(
-                self.credential, subscription_id)
-        return self.sql_clients[subscription_id] 
\ No newline at end of file
+        return self._get_client(_client_class("azure.mgmt.sql", "SqlManagementClient"), subscription_id)
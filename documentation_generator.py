@@ -3,230 +3,335 @@ Generate documentation for exported Azure resources
 """
 import os
 import json
+import operator
 import yaml
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from jinja2 import Environment, FileSystemLoader, select_autoescape
+from pathlib import Path
+from jinja2 import Environment, FileSystemBytecodeCache, FileSystemLoader, select_autoescape
+
+# Prefer the libyaml-backed dumper. The full (not safe) dumper is kept
+# because exported properties may contain SDK enum values.
+YAML_DUMPER = getattr(yaml, "CDumper", yaml.Dumper)
+
+# Pre-built indentation strings for nested property lists
+INDENTS = tuple("  " * i for i in range(32))
+
+# Sentinel marking an exhausted iterator in _append_properties
+_EXHAUSTED = object()
+
+def _indent(level):
+    """Return the indentation string for a nesting level"""
+    return INDENTS[level] if level < len(INDENTS) else "  " * level
+
+# Sort order of resources in the consolidated view
+CONSOLIDATED_SORT_KEY = operator.attrgetter("sub_name", "rg", "name")
+
+# Number of threads used to write documentation files
+MAX_WRITE_WORKERS = 8
+
+def _write_file(path, content):
+    """Write content, either a string or a template stream, to a file"""
+    if isinstance(content, str):
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(content)
+    else:
+        with open(path, "w", encoding="utf-8") as f:
+            content.dump(f)
+
+class _ResourceView:
+    """A resource's rendered consolidated-view entry and its sort fields"""
+    __slots__ = ("sub_name", "rg", "name", "block")
+    
+    def __init__(self, sub_name, rg, name, block):
+        self.sub_name = sub_name
+        self.rg = rg
+        self.name = name
+        self.block = block
 
 class DocumentationGenerator:
     """Generate documentation from exported resource data"""
     
-    def __init__(self, output_dir, format="markdown"):
-        self.output_dir = output_dir
+    def __init__(self, output_dir, format="markdown", save_raw=False, json_dumps=None, ndjson=False):
+        # Output paths are joined onto a single resolved Path
+        self.output_dir = Path(output_dir)
         self.format = format
-        self.data_dir = os.path.join(output_dir, "data")
-        self.docs_dir = os.path.join(output_dir, "docs")
-        self.consolidated_dir = os.path.join(output_dir, "consolidated")
+        self.save_raw = save_raw
+        # Write raw JSON data as one NDJSON file with a line per subscription
+        self.ndjson = ndjson
+        # Serializer returning JSON bytes for the raw data; stdlib json is used when None
+        self.json_dumps = json_dumps
+        self.data_dir = self.output_dir / "data"
+        self.docs_dir = self.output_dir / "docs"
+        self.consolidated_dir = self.output_dir / "consolidated"
         
         # Create directories
-        os.makedirs(self.data_dir, exist_ok=True)
-        os.makedirs(self.docs_dir, exist_ok=True)
-        os.makedirs(self.consolidated_dir, exist_ok=True)
+        if self.save_raw:
+            self.data_dir.mkdir(parents=True, exist_ok=True)
+        self.docs_dir.mkdir(parents=True, exist_ok=True)
+        self.consolidated_dir.mkdir(parents=True, exist_ok=True)
         
         # Initialize Jinja2 environment for templates
         self.env = Environment(
             loader=FileSystemLoader(os.path.join(os.path.dirname(__file__), "templates")),
-            autoescape=select_autoescape(['html', 'xml'])
+            autoescape=select_autoescape(['html', 'xml']),
+            bytecode_cache=FileSystemBytecodeCache(),
+            trim_blocks=True,
+            lstrip_blocks=True,
+            keep_trailing_newline=True
         )
+        self.env.filters["properties"] = self._format_properties
+    
+    def begin(self):
+        """Start a documentation run to which subscriptions are added one at a time"""
+        # Timestamps shared by all generated pages and raw data files
+        now = datetime.now()
+        self._generated_on = now.strftime('%Y-%m-%d %H:%M:%S')
+        self._timestamp = now.strftime("%Y-%m-%d-%H-%M-%S")
+        self._subscriptions = []
+        self._resources_by_type = {}
+        
+        self._raw_file = None
+        if self.save_raw and self.ndjson and self.format == "json":
+            self._raw_file = open(self.data_dir / f"azure_resources_{self._timestamp}.ndjson", "wb")
+    
+    def add_subscription(self, sub_id, sub_name, resources):
+        """Write the documentation for one exported subscription"""
+        # Save the raw data first if requested
+        if self._raw_file is not None:
+            self._append_raw_line(sub_id, sub_name, resources)
+        elif self.save_raw:
+            self._save_raw_data(sub_id, {"name": sub_name, "resources": resources}, self._timestamp)
+        
+        self._write_files(self._generate_subscription_docs(sub_id, sub_name, resources))
+        
+        # Keep only what the index and consolidated view need, so the
+        # subscription's resources can be released by the caller
+        self._subscriptions.append((sub_id, sub_name))
+        self._collect_consolidated_entries(sub_id, sub_name, resources)
+    
+    def finish(self):
+        """Write the index and consolidated views for all added subscriptions"""
+        if self._raw_file is not None:
+            self._raw_file.close()
+            self._raw_file = None
+        
+        files = [self._generate_index(self._generated_on)]
+        files.extend(self._generate_consolidated_view(self._generated_on))
+        self._write_files(files)
     
     def generate(self, resources):
         """Generate documentation for the given resources"""
-        # First, save the raw data
-        self._save_raw_data(resources)
-        
-        # Generate documentation for each subscription
+        self.begin()
         for sub_id, subscription in resources.items():
-            self._generate_subscription_docs(sub_id, subscription)
+            self.add_subscription(sub_id, subscription["name"], subscription["resources"])
+        self.finish()
+    
+    def _write_files(self, files):
+        """Write (path, content) pairs to disk in parallel"""
+        # Create all directories up front so the workers only write
+        for directory in {path.parent for path, _ in files}:
+            directory.mkdir(parents=True, exist_ok=True)
         
-        # Generate index page
-        self._generate_index(resources)
+        with ThreadPoolExecutor(max_workers=MAX_WRITE_WORKERS) as executor:
+            futures = [executor.submit(_write_file, path, content) for path, content in files]
+            for future in futures:
+                future.result()
+    
+    def _append_raw_line(self, sub_id, sub_name, resources):
+        """Append one subscription's raw data to the NDJSON file"""
+        record = {"id": sub_id, "name": sub_name, "resources": resources}
+        if self.json_dumps is not None:
+            line = self.json_dumps(record)
+        else:
+            line = json.dumps(record, separators=(",", ":")).encode("utf-8")
         
-        # Generate consolidated resource type view
-        self._generate_consolidated_view(resources)
+        # Flush each line so the file can be read while the export is running
+        self._raw_file.write(line + b"\n")
+        self._raw_file.flush()
     
-    def _save_raw_data(self, resources):
-        """Save the raw exported data"""
-        timestamp = datetime.now().strftime("%Y-%m-%d-%H-%M-%S")
-        filename = f"azure_resources_{timestamp}"
+    def _save_raw_data(self, sub_id, subscription, timestamp):
+        """Save the raw exported data of one subscription"""
+        filename = f"azure_resources_{timestamp}_{sub_id}"
+        resources = {sub_id: subscription}
         
         if self.format == "json":
-            with open(os.path.join(self.data_dir, f"{filename}.json"), "w") as f:
-                json.dump(resources, f, indent=2)
+            if self.json_dumps is not None:
+                with open(self.data_dir / f"{filename}.json", "wb") as f:
+                    f.write(self.json_dumps(resources))
+            else:
+                with open(self.data_dir / f"{filename}.json", "w") as f:
+                    json.dump(resources, f, separators=(",", ":"))
         else:  # yaml
-            with open(os.path.join(self.data_dir, f"{filename}.yaml"), "w") as f:
-                yaml.dump(resources, f, default_flow_style=False)
+            with open(self.data_dir / f"{filename}.yaml", "w") as f:
+                yaml.dump(resources, f, Dumper=YAML_DUMPER, default_flow_style=False)
     
-    def _generate_subscription_docs(self, sub_id, subscription):
+    def _generate_subscription_docs(self, sub_id, sub_name, resources):
         """Generate documentation for a subscription"""
-        sub_name = subscription["name"]
-        resources = subscription["resources"]
-        
-        # Create subscription directory
-        sub_dir = os.path.join(self.docs_dir, sub_id)
-        os.makedirs(sub_dir, exist_ok=True)
+        sub_dir = self.docs_dir / sub_id
         
         # Generate subscription overview
-        self._generate_subscription_overview(sub_dir, sub_id, sub_name, resources)
+        files = [self._generate_subscription_overview(sub_dir, sub_id, sub_name, resources)]
         
         # Generate documentation for each resource group
         for rg_name, resource_types in resources.items():
-            self._generate_resource_group_docs(sub_dir, sub_id, sub_name, rg_name, resource_types)
+            files.extend(self._generate_resource_group_docs(sub_dir, sub_id, sub_name, rg_name, resource_types))
+        
+        return files
     
     def _generate_subscription_overview(self, sub_dir, sub_id, sub_name, resources):
         """Generate overview documentation for a subscription"""
         # For now, create a simple markdown file
-        with open(os.path.join(sub_dir, "overview.md"), "w") as f:
-            f.write(f"# Subscription Overview: {sub_name}\n\n")
-            f.write(f"Subscription ID: `{sub_id}`\n\n")
-            f.write("## Resource Groups\n\n")
-            
-            for rg_name in resources.keys():
-                f.write(f"- [{rg_name}]({rg_name}/overview.md)\n")
+        parts = [
+            f"# Subscription Overview: {sub_name}\n\n",
+            f"Subscription ID: `{sub_id}`\n\n",
+            "## Resource Groups\n\n",
+        ]
+        
+        for rg_name in resources.keys():
+            parts.append(f"- [{rg_name}]({rg_name}/overview.md)\n")
+        
+        return sub_dir / "overview.md", "".join(parts)
     
     def _generate_resource_group_docs(self, sub_dir, sub_id, sub_name, rg_name, resource_types):
         """Generate documentation for a resource group"""
-        # Create resource group directory
-        rg_dir = os.path.join(sub_dir, rg_name)
-        os.makedirs(rg_dir, exist_ok=True)
+        rg_dir = sub_dir / rg_name
         
         # Generate resource group overview
-        with open(os.path.join(rg_dir, "overview.md"), "w") as f:
-            f.write(f"# Resource Group: {rg_name}\n\n")
-            f.write(f"Subscription: {sub_name} (`{sub_id}`)\n\n")
-            f.write("## Resource Types\n\n")
-            
-            for resource_type, resources in resource_types.items():
-                type_name = resource_type.split('/')[-1]
-                f.write(f"- [{type_name}]({type_name}.md) ({len(resources)} resources)\n")
+        parts = [
+            f"# Resource Group: {rg_name}\n\n",
+            f"Subscription: {sub_name} (`{sub_id}`)\n\n",
+            "## Resource Types\n\n",
+        ]
+        
+        # Derive each short type name once for both the overview and the type pages
+        named_types = [
+            (resource_type, resource_type.rsplit('/', 1)[-1], resources)
+            for resource_type, resources in resource_types.items()
+        ]
+        
+        for resource_type, type_name, resources in named_types:
+            parts.append(f"- [{type_name}]({type_name}.md) ({len(resources)} resources)\n")
+        
+        files = [(rg_dir / "overview.md", "".join(parts))]
         
         # Generate documentation for each resource type
-        for resource_type, resources in resource_types.items():
-            self._generate_resource_type_docs(rg_dir, resource_type, resources)
+        for resource_type, type_name, resources in named_types:
+            files.append(self._generate_resource_type_docs(rg_dir, resource_type, type_name, resources))
+        
+        return files
     
-    def _generate_resource_type_docs(self, rg_dir, resource_type, resources):
+    def _generate_resource_type_docs(self, rg_dir, resource_type, type_name, resources):
         """Generate documentation for a resource type"""
-        type_name = resource_type.split('/')[-1]
-        
-        # For now, create a simple markdown file
-        with open(os.path.join(rg_dir, f"{type_name}.md"), "w") as f:
-            f.write(f"# {type_name.capitalize()}\n\n")
-            f.write(f"Resource Type: `{resource_type}`\n\n")
-            f.write(f"## Resources ({len(resources)})\n\n")
-            
-            for resource in resources:
-                f.write(f"### {resource['name']}\n\n")
-                f.write(f"- Location: {resource['location']}\n")
-                if resource['tags']:
-                    f.write("- Tags:\n")
-                    for key, value in resource['tags'].items():
-                        f.write(f"  - {key}: {value}\n")
-                
-                # Write resource-specific properties
-                if resource['properties']:
-                    f.write("\n#### Properties\n\n")
-                    self._write_properties(f, resource['properties'])
-                
-                f.write("\n")
+        stream = self.env.get_template("resource_type.md.j2").stream(
+            resource_type=resource_type,
+            type_name=type_name,
+            resources=resources
+        )
+        return rg_dir / f"{type_name}.md", stream
     
-    def _write_properties(self, file, properties, indent=0):
-        """Write properties recursively to a file"""
-        indent_str = "  " * indent
+    def _format_properties(self, properties):
+        """Format properties as a nested markdown list"""
+        lines = []
+        self._append_properties(lines, properties)
+        return "".join(lines)
+    
+    def _append_properties(self, lines, properties, indent=0):
+        """Append properties to a list of lines as a nested markdown list"""
+        # Each stack entry is (indent, iterator, is_list) for a dict or list being written
+        stack = [(indent, iter(properties.items()), False)]
         
-        for key, value in properties.items():
+        while stack:
+            level, items, is_list = stack[-1]
+            item = next(items, _EXHAUSTED)
+            if item is _EXHAUSTED:
+                stack.pop()
+                continue
+            
+            indent_str = _indent(level)
+            if is_list:
+                if isinstance(item, dict):
+                    lines.append(f"{indent_str}  -\n")
+                    stack.append((level + 2, iter(item.items()), False))
+                else:
+                    lines.append(f"{indent_str}  - {item}\n")
+                continue
+            
+            key, value = item
             if isinstance(value, dict):
-                file.write(f"{indent_str}- {key}:\n")
-                self._write_properties(file, value, indent + 1)
+                lines.append(f"{indent_str}- {key}:\n")
+                stack.append((level + 1, iter(value.items()), False))
             elif isinstance(value, list):
-                file.write(f"{indent_str}- {key}:\n")
-                for item in value:
-                    if isinstance(item, dict):
-                        file.write(f"{indent_str}  -\n")
-                        self._write_properties(file, item, indent + 2)
-                    else:
-                        file.write(f"{indent_str}  - {item}\n")
+                lines.append(f"{indent_str}- {key}:\n")
+                stack.append((level, iter(value), True))
             else:
-                file.write(f"{indent_str}- {key}: {value}\n")
+                lines.append(f"{indent_str}- {key}: {value}\n")
     
-    def _generate_index(self, resources):
+    def _generate_index(self, generated_on):
         """Generate an index page for all documentation"""
-        with open(os.path.join(self.docs_dir, "index.md"), "w") as f:
-            f.write("# Azure Resources Documentation\n\n")
-            f.write(f"Generated on: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n\n")
-            
-            f.write("## Subscriptions\n\n")
-            for sub_id, subscription in resources.items():
-                f.write(f"- [{subscription['name']}]({sub_id}/overview.md) (`{sub_id}`)\n")
+        parts = [
+            "# Azure Resources Documentation\n\n",
+            f"Generated on: {generated_on}\n\n",
+            "## Subscriptions\n\n",
+        ]
+        
+        # Subscriptions arrive in completion order, so sort them for a stable index
+        for sub_id, sub_name in sorted(self._subscriptions, key=lambda sub: (sub[1], sub[0])):
+            parts.append(f"- [{sub_name}]({sub_id}/overview.md) (`{sub_id}`)\n")
+        
+        return self.docs_dir / "index.md", "".join(parts)
     
-    def _generate_consolidated_view(self, resources):
+    def _collect_consolidated_entries(self, sub_id, sub_name, resources):
+        """Render the consolidated view entries of a subscription's resources"""
+        template = self.env.get_template("consolidated_resource.md.j2")
+        
+        for rg_name, resource_types in resources.items():
+            for resource_type, resource_list in resource_types.items():
+                bucket = self._resources_by_type.setdefault(resource_type, [])
+                
+                # Store the rendered markdown rather than the resource itself
+                for resource in resource_list:
+                    block = template.render(sub_id=sub_id, sub_name=sub_name, rg=rg_name, resource=resource)
+                    bucket.append(_ResourceView(sub_name, rg_name, resource["name"], block))
+    
+    def _generate_consolidated_view(self, generated_on):
         """Generate a consolidated view of all resources grouped by type"""
-        # Dictionary to store resources by type
-        resources_by_type = {}
+        resources_by_type = self._resources_by_type
         
-        # Collect all resources across subscriptions and group by type
-        for sub_id, subscription in resources.items():
-            sub_name = subscription["name"]
-            
-            for rg_name, resource_types in subscription["resources"].items():
-                for resource_type, resource_list in resource_types.items():
-                    if resource_type not in resources_by_type:
-                        resources_by_type[resource_type] = []
-                    
-                    # Add subscription and resource group info to each resource
-                    for resource in resource_list:
-                        resource_info = {
-                            "subscription_id": sub_id,
-                            "subscription_name": sub_name,
-                            "resource_group": rg_name,
-                            **resource  # Include all existing resource information
-                        }
-                        resources_by_type[resource_type].append(resource_info)
+        # Sort resource types alphabetically, and resources by subscription,
+        # resource group, and name
+        sorted_types = []
+        for resource_type in sorted(resources_by_type.keys()):
+            resources = resources_by_type[resource_type]
+            resources.sort(key=CONSOLIDATED_SORT_KEY)
+            sorted_types.append((resource_type, resource_type.rsplit('/', 1)[-1], resources))
         
         # Generate the consolidated view file
-        consolidated_file = os.path.join(self.consolidated_dir, "resources_by_type.md")
-        with open(consolidated_file, "w") as f:
-            f.write("# Consolidated Azure Resources by Type\n\n")
-            f.write(f"Generated on: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n\n")
-            
-            # Sort resource types alphabetically
-            for resource_type in sorted(resources_by_type.keys()):
-                resources = resources_by_type[resource_type]
-                type_name = resource_type.split('/')[-1]
-                
-                f.write(f"## {type_name} (`{resource_type}`)\n\n")
-                f.write(f"Total Resources: {len(resources)}\n\n")
-                
-                # Sort resources by subscription, resource group, and name
-                resources.sort(key=lambda x: (x["subscription_name"], x["resource_group"], x["name"]))
-                
-                for resource in resources:
-                    f.write(f"### {resource['name']}\n\n")
-                    f.write(f"- Subscription: {resource['subscription_name']} (`{resource['subscription_id']}`)\n")
-                    f.write(f"- Resource Group: {resource['resource_group']}\n")
-                    f.write(f"- Location: {resource['location']}\n")
-                    
-                    if resource['tags']:
-                        f.write("- Tags:\n")
-                        for key, value in resource['tags'].items():
-                            f.write(f"  - {key}: {value}\n")
-                    
-                    if resource['properties']:
-                        f.write("\n#### Properties\n\n")
-                        self._write_properties(f, resource['properties'])
-                    
-                    f.write("\n")
+        consolidated_file = self.consolidated_dir / "resources_by_type.md"
+        stream = self.env.get_template("consolidated.md.j2").stream(
+            generated_on=generated_on,
+            resource_types=sorted_types
+        )
+        files = [(consolidated_file, stream)]
         
         # Generate a summary file
-        summary_file = os.path.join(self.consolidated_dir, "resource_type_summary.md")
-        with open(summary_file, "w") as f:
-            f.write("# Azure Resource Type Summary\n\n")
-            f.write(f"Generated on: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n\n")
-            f.write("| Resource Type | Count |\n")
-            f.write("|--------------|-------|\n")
-            
-            total_resources = 0
-            for resource_type in sorted(resources_by_type.keys()):
-                count = len(resources_by_type[resource_type])
-                total_resources += count
-                f.write(f"| `{resource_type}` | {count} |\n")
-            
-            f.write("\n")
-            f.write(f"**Total Resources: {total_resources}**\n") 
\ No newline at end of file
+        summary_file = self.consolidated_dir / "resource_type_summary.md"
+        parts = [
+            "# Azure Resource Type Summary\n\n",
+            f"Generated on: {generated_on}\n\n",
+            "| Resource Type | Count |\n",
+            "|--------------|-------|\n",
+        ]
+        
+        total_resources = 0
+        for resource_type, _, resources in sorted_types:
+            count = len(resources)
+            total_resources += count
+            parts.append(f"| `{resource_type}` | {count} |\n")
+        
+        parts.append("\n")
+        parts.append(f"**Total Resources: {total_resources}**\n")
+        
+        files.append((summary_file, "".join(parts)))
+        
+        return files
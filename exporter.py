@@ -1,45 +1,108 @@
 """
 Exporter for Azure resources
 """
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from rich.progress import Progress
 from rich.console import Console
 
 console = Console()
 
+# Default upper bound on ARM requests in flight at once. It also sizes the
+# two thread pools shared by all subscriptions an exporter works on.
+MAX_CONCURRENT_REQUESTS = 32
+
+# Resource types for which resource-specific details are exported
+DETAILED_RESOURCE_TYPES = (
+    "microsoft.network/virtualnetworks",
+    "microsoft.network/networkinterfaces",
+    "microsoft.compute/virtualmachines",
+    "microsoft.storage/storageaccounts",
+    "microsoft.sql/servers",
+)
+
+def _has_details(resource_type):
+    """Check whether resource-specific details are exported for a lowercased resource type"""
+    return any(detailed_type in resource_type for detailed_type in DETAILED_RESOURCE_TYPES)
+
+def _reference_id(reference):
+    """Return the ID of a sub-resource reference from a property bag, if set"""
+    return reference.get("id") if reference else None
+
 class ResourceExporter:
     """Export resources from Azure subscriptions"""
     
-    def __init__(self, azure_client):
+    def __init__(self, azure_client, max_workers=MAX_CONCURRENT_REQUESTS):
         self.azure_client = azure_client
+        self.max_workers = max_workers
+        self._request_slots = threading.BoundedSemaphore(max_workers)
+        # Resource group listings and typed detail GETs run on separate pools, so
+        # a resource group task waiting on its details never blocks a detail task.
+        # Together they bound the exporter to 2 * max_workers threads however
+        # many subscriptions and resource groups are exported.
+        self._group_executor = ThreadPoolExecutor(max_workers=max_workers)
+        self._detail_executor = ThreadPoolExecutor(max_workers=max_workers)
     
-    def export_resources(self, subscription_id):
+    def close(self):
+        """Shut down the exporter's thread pools"""
+        self._group_executor.shutdown()
+        self._detail_executor.shutdown()
+    
+    def export_resources(self, subscription_id, progress=None, description="Exporting resources..."):
         """Export all resources from a subscription"""
-        resources = {}
-        
         # Get resource client
         resource_client = self.azure_client.get_resource_client(subscription_id)
         
-        # Get all resource groups
-        resource_groups = list(resource_client.resource_groups.list())
+        # Get all resource groups, a page at a time
+        resource_groups = []
+        for page in resource_client.resource_groups.list().by_page():
+            resource_groups.extend(page)
         
-        with Progress() as progress:
-            task = progress.add_task(f"Exporting resources...", total=len(resource_groups))
-            
-            for rg in resource_groups:
-                resources[rg.name] = self._export_resource_group(subscription_id, rg.name)
-                progress.update(task, advance=1)
+        # Pre-populate in listing order so the output order does not depend on
+        # which resource group finishes first
+        resources = {rg.name: {} for rg in resource_groups}
+        
+        # Only one live display can be active at a time, so concurrent exports
+        # add their tasks to a shared progress display instead of starting their own
+        if progress is None:
+            with Progress() as progress:
+                self._export_resource_groups(subscription_id, resource_groups, resources, progress, description)
+        else:
+            self._export_resource_groups(subscription_id, resource_groups, resources, progress, description)
         
         return resources
     
+    def _export_resource_groups(self, subscription_id, resource_groups, resources, progress, description):
+        """Export the given resource groups concurrently into resources"""
+        task = progress.add_task(description, total=len(resource_groups))
+        
+        # Resource groups are independent, so fetch them concurrently
+        futures = {
+            self._group_executor.submit(self._export_resource_group, subscription_id, rg.name): rg.name
+            for rg in resource_groups
+        }
+        
+        for future in as_completed(futures):
+            resources[futures[future]] = future.result()
+            progress.update(task, advance=1)
+    
     def _export_resource_group(self, subscription_id, resource_group_name):
         """Export all resources from a resource group"""
         resource_client = self.azure_client.get_resource_client(subscription_id)
         
-        # Get all resources in the resource group
-        resources_list = resource_client.resources.list_by_resource_group(resource_group_name)
+        # Get all resources in the resource group. Expanding the properties
+        # returns each resource's property bag with the listing, which avoids
+        # a typed GET per resource.
+        resources_list = []
+        with self._request_slots:
+            pages = resource_client.resources.list_by_resource_group(
+                resource_group_name, expand="properties").by_page()
+            for page in pages:
+                resources_list.extend(page)
         
         # Group resources by type
         resources_by_type = {}
+        pending_details = []
         for resource in resources_list:
             resource_type = resource.type
             if resource_type not in resources_by_type:
@@ -55,23 +118,130 @@ class ResourceExporter:
                 "properties": {}
             }
             
-            # Add resource-specific details
-            self._add_resource_details(subscription_id, resource, resource_info)
-            
             resources_by_type[resource_type].append(resource_info)
+            
+            # Resources listed without a property bag need a typed GET, but
+            # only types with resource-specific details have one
+            if resource.properties is not None:
+                self._add_resource_details(subscription_id, resource_group_name, resource, resource_info)
+            elif _has_details(resource_type.lower()):
+                pending_details.append((resource, resource_info))
+        
+        # Add the remaining resource-specific details. Each call is an independent
+        # request that fills in its own resource_info, so they can run concurrently.
+        futures = [
+            self._detail_executor.submit(
+                self._add_resource_details, subscription_id, resource_group_name, resource, resource_info)
+            for resource, resource_info in pending_details
+        ]
+        for future in futures:
+            future.result()
         
         return resources_by_type
     
-    def _add_resource_details(self, subscription_id, resource, resource_info):
+    def _add_resource_details(self, subscription_id, resource_group_name, resource, resource_info):
         """Add resource-specific details to the resource info"""
         resource_type = resource.type.lower()
         
+        if resource.properties is not None:
+            self._read_resource_details(resource, resource_type, resource_info)
+        else:
+            with self._request_slots:
+                self._fetch_resource_details(subscription_id, resource_group_name, resource, resource_type, resource_info)
+    
+    def _read_resource_details(self, resource, resource_type, resource_info):
+        """Read resource-specific details from the expanded listing's property bag"""
+        properties = resource.properties
+        
+        try:
+            # Virtual Network
+            if "microsoft.network/virtualnetworks" in resource_type:
+                def get_subnet_address_space(subnet_properties):
+                    if subnet_properties.get("addressPrefix"):
+                        return subnet_properties["addressPrefix"]
+                    elif subnet_properties.get("addressPrefixes"):
+                        return subnet_properties["addressPrefixes"][0]
+                    return "Unknown"
+                
+                subnets = []
+                for subnet in properties.get("subnets") or []:
+                    subnet_properties = subnet.get("properties") or {}
+                    subnets.append({
+                        "name": subnet.get("name"),
+                        "address_prefix": get_subnet_address_space(subnet_properties),
+                        "network_security_group": _reference_id(subnet_properties.get("networkSecurityGroup")),
+                        "route_table": _reference_id(subnet_properties.get("routeTable")),
+                        "service_endpoints": [endpoint.get("service") for endpoint in subnet_properties.get("serviceEndpoints") or []],
+                        "delegations": [
+                            (delegation.get("properties") or {}).get("serviceName")
+                            for delegation in subnet_properties.get("delegations") or []
+                        ],
+                        "private_endpoint_network_policies": subnet_properties.get("privateEndpointNetworkPolicies"),
+                        "private_link_service_network_policies": subnet_properties.get("privateLinkServiceNetworkPolicies")
+                    })
+                
+                resource_info["properties"] = {
+                    "address_space": list((properties.get("addressSpace") or {}).get("addressPrefixes") or []),
+                    "subnets": subnets
+                }
+            
+            # Network Interface
+            elif "microsoft.network/networkinterfaces" in resource_type:
+                ip_configurations = []
+                for ip_config in properties.get("ipConfigurations") or []:
+                    ip_properties = ip_config.get("properties") or {}
+                    ip_configurations.append({
+                        "name": ip_config.get("name"),
+                        "private_ip_address": ip_properties.get("privateIPAddress"),
+                        "private_ip_allocation_method": ip_properties.get("privateIPAllocationMethod"),
+                        "public_ip_address": _reference_id(ip_properties.get("publicIPAddress"))
+                    })
+                
+                resource_info["properties"] = {
+                    "ip_configurations": ip_configurations
+                }
+            
+            # Virtual Machine
+            elif "microsoft.compute/virtualmachines" in resource_type:
+                storage_profile = properties.get("storageProfile") or {}
+                network_profile = properties.get("networkProfile") or {}
+                resource_info["properties"] = {
+                    "vm_size": (properties.get("hardwareProfile") or {}).get("vmSize"),
+                    "os_type": (storage_profile.get("osDisk") or {}).get("osType"),
+                    "admin_username": (properties.get("osProfile") or {}).get("adminUsername"),
+                    "network_interfaces": [nic.get("id") for nic in network_profile.get("networkInterfaces") or []]
+                }
+            
+            # Storage Account
+            elif "microsoft.storage/storageaccounts" in resource_type:
+                resource_info["properties"] = {
+                    "sku": resource.sku.name if resource.sku else None,
+                    "kind": resource.kind,
+                    "access_tier": properties.get("accessTier"),
+                    "https_only": properties.get("supportsHttpsTrafficOnly")
+                }
+            
+            # SQL Server
+            elif "microsoft.sql/servers" in resource_type:
+                resource_info["properties"] = {
+                    "version": properties.get("version"),
+                    "administrator_login": properties.get("administratorLogin"),
+                    "fully_qualified_domain_name": properties.get("fullyQualifiedDomainName")
+                }
+            
+            # For other resource types, we keep the basic info only
+        
+        except Exception as e:
+            console.print(f"[yellow]Warning: Could not read details for {resource.name}: {str(e)}[/yellow]")
+    
+    def _fetch_resource_details(self, subscription_id, resource_group_name, resource, resource_type, resource_info):
+        """Fetch typed details for a resource from its management client"""
         try:
             # Virtual Network
             if "microsoft.network/virtualnetworks" in resource_type:
                 network_client = self.azure_client.get_network_client(subscription_id)
                 vnet = network_client.virtual_networks.get(
-                    resource_group_name=resource.id.split('/')[4],
+                    resource_group_name=resource_group_name,
                     virtual_network_name=resource.name
                 )
                 
@@ -116,7 +286,7 @@ class ResourceExporter:
             elif "microsoft.network/networkinterfaces" in resource_type:
                 network_client = self.azure_client.get_network_client(subscription_id)
                 nic = network_client.network_interfaces.get(
-                    resource_group_name=resource.id.split('/')[4],
+                    resource_group_name=resource_group_name,
                     network_interface_name=resource.name
                 )
                 resource_info["properties"] = {
@@ -134,7 +304,7 @@ class ResourceExporter:
             elif "microsoft.compute/virtualmachines" in resource_type:
                 compute_client = self.azure_client.get_compute_client(subscription_id)
                 vm = compute_client.virtual_machines.get(
-                    resource_group_name=resource.id.split('/')[4],
+                    resource_group_name=resource_group_name,
                     vm_name=resource.name
                 )
                 resource_info["properties"] = {
@@ -148,7 +318,7 @@ class ResourceExporter:
             elif "microsoft.storage/storageaccounts" in resource_type:
                 storage_client = self.azure_client.get_storage_client(subscription_id)
                 storage = storage_client.storage_accounts.get_properties(
-                    resource_group_name=resource.id.split('/')[4],
+                    resource_group_name=resource_group_name,
                     account_name=resource.name
                 )
                 resource_info["properties"] = {
@@ -162,7 +332,7 @@ class ResourceExporter:
             elif "microsoft.sql/servers" in resource_type:
                 sql_client = self.azure_client.get_sql_client(subscription_id)
                 server = sql_client.servers.get(
-                    resource_group_name=resource.id.split('/')[4],
+                    resource_group_name=resource_group_name,
                     server_name=resource.name
                 )
                 resource_info["properties"] = {
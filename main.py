@@ -3,50 +3,116 @@
 Azure Resource Exporter and Documentation Generator
 """
 import os
+import re
+import sys
+import json
+import time
+import queue
 import argparse
-from rich.console import Console
-from rich.prompt import Prompt, Confirm
+import threading
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from functools import lru_cache
 
-from azure_client import AzureClient
-from exporter import ResourceExporter
-from documentation_generator import DocumentationGenerator
+# Rich and the Azure SDK are imported only after argument parsing, so that
+# --help and argument errors return without loading them. The console is
+# created in main().
+console = None
 
-console = Console()
+# Static status messages, parsed into Rich text once by _static_text
+BANNER = "[bold green]Azure Resource Exporter and Documentation Generator[/bold green]"
+AUTH_MSG = "Authenticating with Azure..."
+TENANTS_MSG = "Retrieving available Azure tenants..."
+SUBSCRIPTIONS_MSG = "Retrieving available subscriptions..."
+EXPORT_MSG = "[bold]Exporting resources and generating documentation...[/bold]"
+INVALID_TENANT_MSG = "[bold red]Invalid selection. Please enter a valid tenant number.[/bold red]"
+INVALID_SUBSCRIPTIONS_MSG = "[bold red]Invalid selection. Please enter valid subscription numbers.[/bold red]"
+
+# Default for --parallel: the number of ARM requests in flight at once, and
+# the most subscriptions exported concurrently
+DEFAULT_PARALLEL = 32
+
+# Maximum number of exported subscriptions waiting for documentation
+DOC_QUEUE_SIZE = 16
+
+# On-disk cache of tenant and subscription listings
+CACHE_FILE = os.path.join(os.path.expanduser("~"), ".azure-docs-exporter", "cache.json")
+CACHE_TTL = 3600
+
+# Longer choice lists are printed as a table, shorter ones as plain lines
+MAX_PLAIN_CHOICES = 20
+
+# A subscription number or an inclusive range of numbers, e.g. "3" or "1-5"
+_IDX_RE = re.compile(r"(\d+)(?:\s*-\s*(\d+))?")
 
 def main():
     parser = argparse.ArgumentParser(description="Export Azure resources and generate documentation")
     parser.add_argument("--output", default="./output", help="Output directory for exported data and documentation")
     parser.add_argument("--format", choices=["json", "yaml", "markdown"], default="markdown", 
-                        help="Output format for documentation")
+                        help="Format of the raw exported data; json and yaml save it, markdown only writes documentation")
     parser.add_argument("--non-interactive", action="store_true", 
-                        help="Use default credentials instead of interactive login")
+                        help="Use default credentials instead of interactive login, and select all subscriptions")
+    parser.add_argument("--save-raw", action="store_true",
+                        help="Also save the raw exported data with --format markdown, as YAML")
+    parser.add_argument("--refresh", action="store_true",
+                        help="Ignore cached tenant and subscription listings and fetch them again")
+    parser.add_argument("--parallel", type=int, default=0,
+                        help=f"Maximum number of concurrent Azure requests (default: {DEFAULT_PARALLEL})")
+    parser.add_argument("--tenant-id", help="Use this tenant instead of prompting for one")
+    parser.add_argument("--subscription-ids",
+                        help="Comma-separated subscription IDs to export instead of prompting")
     args = parser.parse_args()
+    if args.parallel < 0:
+        parser.error("--parallel must be a positive number")
+    
+    global console
+    from rich.console import Console
+    from rich.markup import escape
+    from azure_client import AzureClient
+    from exporter import ResourceExporter
+    from documentation_generator import DocumentationGenerator
+    
+    console = Console()
     
-    # Ensure output directory exists
-    os.makedirs(args.output, exist_ok=True)
+    # Resolve the output directory once and ensure it exists
+    out = Path(args.output).resolve()
+    out.mkdir(parents=True, exist_ok=True)
     
-    console.print("[bold green]Azure Resource Exporter and Documentation Generator[/bold green]")
+    console.print(_static_text(BANNER))
     
-    # Create Azure client and login
-    azure_client = AzureClient(interactive=not args.non_interactive)
+    # Lower --parallel if ARM starts throttling (429s)
+    workers = args.parallel or DEFAULT_PARALLEL
     
-    console.print("Authenticating with Azure...")
+    # Create Azure client and login, with a connection for every concurrent request
+    azure_client = AzureClient(interactive=not args.non_interactive, max_connections=workers)
+    
+    console.print(_static_text(AUTH_MSG))
     if not azure_client.login():
         console.print("[bold red]Authentication failed. Please check your credentials and try again.[/bold red]")
         return
     
+    # Listings are cached per account; without a known account nothing is cached
+    account_key = azure_client.get_account_key()
+    
     # Get available tenants
-    console.print("Retrieving available Azure tenants...")
-    tenants = azure_client.get_tenants()
+    console.print(_static_text(TENANTS_MSG))
+    tenants, cached = _cached(
+        account_key and f"{account_key}:tenants", azure_client.get_tenants, refresh=args.refresh)
     
     if not tenants:
         console.print("[bold red]No tenants found. Please check your Azure account.[/bold red]")
         return
     
-    console.print(f"[green]Found {len(tenants)} tenants[/green]")
+    console.print(f"[green]Found {len(tenants)} tenants{' (cached)' if cached else ''}[/green]")
     
-    # Let the user select a tenant
-    selected_tenant = select_tenant(tenants)
+    # Use the requested tenant, or let the user select one
+    if args.tenant_id:
+        selected_tenant = next((tenant for tenant in tenants if tenant[0] == args.tenant_id), None)
+        if not selected_tenant:
+            console.print(f"[bold red]Tenant {args.tenant_id} was not found.[/bold red]")
+            return
+    else:
+        selected_tenant = select_tenant(tenants)
     
     if not selected_tenant:
         console.print("[yellow]No tenant selected. Exiting.[/yellow]")
@@ -54,96 +120,311 @@ def main():
     
     # Set the selected tenant
     tenant_id, tenant_name = selected_tenant
-    console.print(f"Using tenant: [cyan]{tenant_name}[/cyan]")
+    console.print(f"Using tenant: [cyan]{escape(tenant_name)}[/cyan]")
     azure_client.set_tenant(tenant_id)
     
     # Get available subscriptions for the selected tenant
-    console.print("Retrieving available subscriptions...")
-    subscriptions = azure_client.get_subscriptions()
+    console.print(_static_text(SUBSCRIPTIONS_MSG))
+    subscriptions, cached = _cached(
+        account_key and f"{account_key}:{tenant_id}:subscriptions", azure_client.get_subscriptions,
+        refresh=args.refresh)
     
     if not subscriptions:
         console.print("[bold red]No subscriptions found in the selected tenant. Please check your permissions.[/bold red]")
         return
     
-    console.print(f"[green]Found {len(subscriptions)} subscriptions[/green]")
+    console.print(f"[green]Found {len(subscriptions)} subscriptions{' (cached)' if cached else ''}[/green]")
     
-    # Let the user select subscriptions
-    selected_subscriptions = select_subscriptions(subscriptions)
+    # Use the requested subscriptions, or let the user select them
+    if args.subscription_ids:
+        selected_subscriptions = _find_subscriptions(subscriptions, args.subscription_ids)
+    else:
+        selected_subscriptions = select_subscriptions(subscriptions, select_all=args.non_interactive)
     
     if not selected_subscriptions:
         console.print("[yellow]No subscriptions selected. Exiting.[/yellow]")
         return
     
     # Initialize the exporter
-    exporter = ResourceExporter(azure_client)
+    console.print(f"Using up to [cyan]{workers}[/cyan] concurrent requests")
+    exporter = ResourceExporter(azure_client, max_workers=workers)
+    
+    # Documentation for each subscription is written as soon as its export
+    # completes, overlapping documentation generation with the remaining exports
+    doc_generator = DocumentationGenerator(
+        out, args.format, save_raw=args.save_raw or args.format != "markdown",
+        json_dumps=_orjson_dumps() if args.format == "json" else None,
+        ndjson=args.format == "json")
+    doc_generator.begin()
     
     # Export resources from selected subscriptions
-    console.print("[bold]Exporting resources from selected subscriptions...[/bold]")
+    console.print(_static_text(EXPORT_MSG))
+    try:
+        _export_and_document(exporter, selected_subscriptions, doc_generator, workers)
+    finally:
+        exporter.close()
     
-    all_resources = {}
-    for sub_id, sub_name in selected_subscriptions:
-        console.print(f"Processing subscription: [cyan]{sub_name}[/cyan]")
-        resources = exporter.export_resources(sub_id)
-        all_resources[sub_id] = {
-            "name": sub_name,
-            "resources": resources
-        }
+    # Generate the index and consolidated views
+    doc_generator.finish()
     
-    # Generate documentation
-    console.print("[bold]Generating documentation...[/bold]")
-    doc_generator = DocumentationGenerator(args.output, args.format)
-    doc_generator.generate(all_resources)
+    console.print(f"[bold green]Export and documentation completed![/bold green]\nOutput saved to: {escape(str(out))}")
+
+@lru_cache(maxsize=None)
+def _static_text(markup):
+    """Parse a constant markup string once and reuse the resulting Text"""
+    from rich.text import Text
+    return Text.from_markup(markup)
+
+def _orjson_dumps():
+    """Return an orjson-based JSON serializer, or None if orjson is not installed"""
+    try:
+        import orjson
+    except ImportError:
+        return None
+    
+    # Compact output, as the raw JSON export is written one record per line
+    options = orjson.OPT_NON_STR_KEYS
+    return lambda obj: orjson.dumps(obj, option=options)
+
+def _load_cache():
+    """Load the on-disk listing cache, treating a missing or unreadable file as empty"""
+    try:
+        with open(CACHE_FILE) as f:
+            cache = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return cache if isinstance(cache, dict) else {}
+
+def _save_cache(cache):
+    """Save the on-disk listing cache, ignoring write failures"""
+    try:
+        os.makedirs(os.path.dirname(CACHE_FILE), exist_ok=True)
+        tmp_file = f"{CACHE_FILE}.tmp"
+        with open(tmp_file, "w") as f:
+            json.dump(cache, f)
+        os.replace(tmp_file, CACHE_FILE)
+    except OSError:
+        pass
+
+def _cached_listing(entry, ttl):
+    """Return the listing stored in a cache entry, or None if it is stale or malformed"""
+    if not isinstance(entry, dict):
+        return None
+    
+    ts = entry.get("ts")
+    value = entry.get("value")
+    if not isinstance(ts, (int, float)) or time.time() - ts >= ttl:
+        return None
+    
+    # Listings are non-empty lists of (id, name) tuples, stored as JSON arrays
+    if not value or not isinstance(value, list):
+        return None
+    if not all(isinstance(item, list) and len(item) == 2 for item in value):
+        return None
+    return [tuple(item) for item in value]
+
+def _cached(key, fetch, ttl=CACHE_TTL, refresh=False):
+    """Return (listing, from_cache) for key, fetching and caching the listing on a miss"""
+    if not key:
+        return fetch(), False
+    
+    cache = _load_cache()
+    listing = None if refresh else _cached_listing(cache.get(key), ttl)
+    if listing is not None:
+        return listing, True
     
-    console.print(f"[bold green]Export and documentation completed![/bold green]")
-    console.print(f"Output saved to: {os.path.abspath(args.output)}")
+    value = fetch()
+    if value:
+        cache[key] = {"ts": time.time(), "value": value}
+        _save_cache(cache)
+    return value, False
+
+def _export_and_document(exporter, subscriptions, doc_generator, max_workers=DEFAULT_PARALLEL):
+    """Export subscriptions in parallel while a single thread writes their documentation"""
+    from rich.markup import escape
+    from rich.progress import Progress
+    
+    doc_queue = queue.Queue(maxsize=DOC_QUEUE_SIZE)
+    errors = []
+    
+    def write_docs():
+        while True:
+            item = doc_queue.get()
+            try:
+                if item is None:
+                    return
+                doc_generator.add_subscription(*item)
+            except Exception as e:
+                errors.append(e)
+            finally:
+                doc_queue.task_done()
+    
+    writer = threading.Thread(target=write_docs, daemon=True)
+    writer.start()
+    
+    try:
+        with Progress(console=console) as progress:
+            with ThreadPoolExecutor(max_workers=min(max_workers, len(subscriptions))) as executor:
+                futures = {
+                    executor.submit(exporter.export_resources, sub_id, progress,
+                                    f"Exporting [cyan]{escape(sub_name)}[/cyan]..."): (sub_id, sub_name)
+                    for sub_id, sub_name in subscriptions
+                }
+                
+                for future in as_completed(futures):
+                    sub_id, sub_name = futures[future]
+                    doc_queue.put((sub_id, sub_name, future.result()))
+    finally:
+        # Let the writer drain the queue and stop
+        doc_queue.put(None)
+        doc_queue.join()
+    
+    if errors:
+        raise errors[0]
+
+def _print_choices(title, choices):
+    """Print numbered (id, name) choices in a single write"""
+    from rich.markup import escape
+    
+    # Short lists read best as plain lines, rendered from one joined string
+    if len(choices) <= MAX_PLAIN_CHOICES:
+        lines = [f"[bold]{title}[/bold]"]
+        lines.extend(
+            f"{i}. [cyan]{escape(choice_name)}[/cyan] ({choice_id})"
+            for i, (choice_id, choice_name) in enumerate(choices, 1)
+        )
+        console.print("\n".join(lines))
+        return
+    
+    from rich.console import Group
+    from rich.table import Table
+    from rich.text import Text
+    
+    table = Table()
+    table.add_column("#", justify="right")
+    table.add_column("Name", style="cyan")
+    table.add_column("ID")
+    
+    # Names come from Azure and are not treated as markup
+    for i, (choice_id, choice_name) in enumerate(choices, 1):
+        table.add_row(str(i), Text(choice_name), choice_id)
+    
+    console.print(Group(Text(title, style="bold"), table))
+
+def _find_subscriptions(subscriptions, subscription_ids):
+    """Select the subscriptions named in a comma-separated list of IDs"""
+    wanted = [sub_id.strip() for sub_id in subscription_ids.split(",") if sub_id.strip()]
+    by_id = dict(subscriptions)
+    
+    for sub_id in wanted:
+        if sub_id not in by_id:
+            console.print(f"[yellow]Subscription {sub_id} was not found and is skipped.[/yellow]")
+    
+    return [(sub_id, by_id[sub_id]) for sub_id in dict.fromkeys(wanted) if sub_id in by_id]
 
 def select_tenant(tenants):
     """Let the user select a tenant"""
-    console.print("[bold]Available Azure tenants:[/bold]")
+    from rich.prompt import Prompt
     
-    for i, (tenant_id, tenant_name) in enumerate(tenants, 1):
-        console.print(f"{i}. [cyan]{tenant_name}[/cyan] ({tenant_id})")
+    # Nothing to choose from, so do not prompt
+    if len(tenants) == 1:
+        return tenants[0]
     
-    selected_index = Prompt.ask(
-        "Enter tenant number to use",
-        default="1"
-    )
+    _print_choices("Available Azure tenants:", tenants)
     
+    # Re-prompt without reprinting the list until the selection is valid
+    while True:
+        selected_index = Prompt.ask(
+            "Enter tenant number to use",
+            default="1"
+        )
+        
+        try:
+            index = int(selected_index.strip())
+            if 1 <= index <= len(tenants):
+                return tenants[index-1]
+        except ValueError:
+            pass
+        
+        console.print(_static_text(INVALID_TENANT_MSG))
+
+def _read_key():
+    """Read a single keystroke from the terminal without waiting for Enter"""
     try:
-        index = int(selected_index.strip())
-        if 1 <= index <= len(tenants):
-            return tenants[index-1]
+        import msvcrt
+    except ImportError:
+        import termios
+        import tty
+        
+        fd = sys.stdin.fileno()
+        old_settings = termios.tcgetattr(fd)
+        try:
+            tty.setcbreak(fd)
+            return sys.stdin.read(1)
+        finally:
+            termios.tcsetattr(fd, termios.TCSADRAIN, old_settings)
+    
+    key = msvcrt.getwch()
+    if key == "\x03":
+        raise KeyboardInterrupt
+    return key
+
+def _ask_yn(prompt, default=True):
+    """Ask a yes/no question answered with a single keystroke, Enter taking the default"""
+    # Without a terminal there are no keystrokes to read, so ask for a line instead
+    if not sys.stdin.isatty():
+        from rich.prompt import Confirm
+        return Confirm.ask(prompt, default=default)
+    
+    from rich.markup import escape
+    
+    choices = escape("[Y/n]" if default else "[y/N]")
+    console.print(f"{prompt} [bold magenta]{choices}[/bold magenta] ", end="")
+    while True:
+        key = _read_key().lower()
+        if key in ("\r", "\n"):
+            answer = default
+        elif key in ("y", "n"):
+            answer = key == "y"
         else:
-            console.print("[bold red]Invalid selection. Please enter a valid tenant number.[/bold red]")
-            return select_tenant(tenants)
-    except (ValueError, IndexError):
-        console.print("[bold red]Invalid selection. Please enter a valid tenant number.[/bold red]")
-        return select_tenant(tenants)
+            continue
+        console.print("y" if answer else "n")
+        return answer
 
-def select_subscriptions(subscriptions):
+def select_subscriptions(subscriptions, select_all=False):
     """Let the user select one or more subscriptions"""
-    console.print("[bold]Available subscriptions:[/bold]")
+    from rich.markup import escape
+    from rich.prompt import Prompt
     
-    for i, (sub_id, sub_name) in enumerate(subscriptions, 1):
-        console.print(f"{i}. [cyan]{sub_name}[/cyan] ({sub_id})")
+    # Nothing to choose from, so do not prompt
+    if len(subscriptions) == 1:
+        console.print(f"Using only subscription: [cyan]{escape(subscriptions[0][1])}[/cyan]")
+        return subscriptions
     
-    select_all = Confirm.ask("Select all subscriptions?")
+    _print_choices("Available subscriptions:", subscriptions)
     
-    if select_all:
+    if select_all or _ask_yn("Select all subscriptions?"):
         return subscriptions
     
-    selected_indices = Prompt.ask(
-        "Enter subscription numbers to process (comma-separated)",
-        default="1"
-    )
-    
-    try:
-        indices = [int(idx.strip()) for idx in selected_indices.split(",")]
-        selected = [subscriptions[i-1] for i in indices if 1 <= i <= len(subscriptions)]
-        return selected
-    except (ValueError, IndexError):
-        console.print("[bold red]Invalid selection. Please enter valid subscription numbers.[/bold red]")
-        return select_subscriptions(subscriptions)
+    # Re-prompt without reprinting the list until the selection is valid
+    while True:
+        selected_indices = Prompt.ask(
+            "Enter subscription numbers to process (comma-separated, ranges like 1-5 allowed)",
+            default="1"
+        )
+        
+        # Every comma-separated part must be a number or a range
+        matches = [_IDX_RE.fullmatch(part.strip()) for part in selected_indices.split(",") if part.strip()]
+        if matches and all(matches):
+            # Clamp ranges to the listed subscriptions; duplicates collapse in the set
+            indices = set()
+            for match in matches:
+                start, end = match.groups()
+                indices.update(range(max(int(start), 1), min(int(end or start), len(subscriptions)) + 1))
+            if indices:
+                return [subscriptions[i-1] for i in sorted(indices)]
+        
+        console.print(_static_text(INVALID_SUBSCRIPTIONS_MSG))
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file